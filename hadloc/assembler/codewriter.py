@@ -21,19 +21,15 @@ def write_code(instructions: list[list[str | int]], file_name: str):
         The names of the 3 files created, in a list, where name of the raw binary file will always be the first element
         in the list.
     """
-    machine_code = [0] * len(instructions)
-    for i in range(len(instructions)):
-        machine_code[i] = instruction_value(instructions[i])
+    machine_code = bytes(map(instruction_value, instructions))
 
     files = [file_name + '.bin', file_name + '_hex.txt', file_name + '_bin.txt']
-    file = open(files[0], 'wb')
-    file.write(bytes(machine_code))
-    file.close()
-
-    file = open(files[1], 'w')
-    writer.display(file, machine_code, 'hex')
-    file = open(files[2], 'w')
-    writer.display(file, machine_code, 'bin')
+    with open(files[0], 'wb') as file:
+        file.write(machine_code)
+    with open(files[1], 'w') as file:
+        writer.display(file, machine_code, 'hex')
+    with open(files[2], 'w') as file:
+        writer.display(file, machine_code, 'bin')
 
     return files
 
@@ -52,16 +48,22 @@ FIXED = {'jmp': JMP | LT | EQ | GT, 'jlt': JMP | LT, 'jeq': JMP | EQ, 'jgt': JMP
 UNARY = {'X': {'not': 0x0, 'neg': 0x8, 'inc': 0xC, 'dec': 0x4},
          'LM': {'not': 0x3, 'neg': 0xF, 'inc': 0xB, 'dec': 0x7}}
 BINARY = {'and': 0xA, 'or': 0xE, 'add': 0x9}
-ARITHMETIC = ['add', 'sub', 'or', 'and', 'not', 'neg', 'inc', 'dec']
+ARITHMETIC = frozenset({'add', 'sub', 'or', 'and', 'not', 'neg', 'inc', 'dec'})
+# Machine code of the output instructions, before the register is added. 'opd' has the D bit set
+OUTPUT = {'opd': 0x0C, 'opi': 0x08}
+# Machine code of every mov instruction, indexed by (source, destination). Moving a register into itself is a nop
+MOV = {(src, dst): FIXED['nop'] if src == dst else
+       0x20 | int(dst == 'M' or src == 'Y') << 4 | REGISTERS[dst] << 2 | REGISTERS[src]
+       for src in REGISTERS for dst in REGISTERS}
 
 
-def instruction_value(instruction: list[str | int]):
+def instruction_value(instruction: list[str | int]) -> int:
     """
-    Determines the 8 bit machine code value of the given instruction. The instruction argument should be a list of
-    CodeObjects, str and int objects of the tokens in the instruction. These are generated by the parser.
-
-    Raises:
-        CompilerException: If the register arguments to the instruction are invalid
+    Determines the 8 bit machine code value of the given instruction. The instruction argument should be a list
+    containing the command (a str), followed by its arguments, which are register names (str) or, for ldb, the byte to
+    load (int). These are generated by the parser and label encoder, which have already validated them, so no error
+    checking is done here. The value is found with a lookup in DISPATCH, followed by a lookup in the table of the
+    encoder it selects.
 
     Args:
         instruction (list): The instruction to determine the machine code value of
@@ -69,51 +71,51 @@ def instruction_value(instruction: list[str | int]):
     Returns:
          The machine code value of the instruction. This will be an 8-bit integer
     """
-    command = instruction[0]
-    if command in FIXED:
-        return FIXED[command]
-
-    if command == 'ldb':
-        return instruction[1] | 0x80
-
-    if command == 'mov':
-        src, dst = instruction[1], instruction[2]
-        if dst == src:
-            return FIXED['nop']
+    encoder = DISPATCH.get(instruction[0])
+    if encoder is None:
+        # In theory this is never reached, as all invalid instructions should have been caught in the tokenizing,
+        # parsing and code writing stage
+        raise Exception("This instruction {} was not able to be encoded, and no error could be found in it. Please"
+                        " update the assembler to handle this instruction".format(instruction))
+    return encoder(instruction)
 
-        s = int(dst == 'M' or src == 'Y')
-        return 0x20 | s << 4 | REGISTERS[dst] << 2 | REGISTERS[src]
 
-    if command in ['opd', 'opi']:
-        d = 1 if command == 'opd' else 0
-        return 0x08 | d << 2 | REGISTERS[instruction[1]]
+def mov_value(instruction: list[str | int]) -> int:
+    """Determines the machine code value of a mov instruction. See instruction_value for more details"""
+    return MOV[instruction[1], instruction[2]]
 
-    arithmetic = arithmetic_value(instruction)
-    if arithmetic is not None:
-        return arithmetic
 
-    # In theory this is never reached, as all invalid instructions should have been caught in the tokenizing,
-    # parsing and code writing stage
-    raise Exception("This instruction {} was not able to be encoded, and no error could be found in it. Please"
-                    " update the assembler to handle this instruction".format(instruction))
+def output_value(instruction: list[str | int]) -> int:
+    """Determines the machine code value of an opd or opi instruction. See instruction_value for more details"""
+    return OUTPUT[instruction[0]] | REGISTERS[instruction[1]]
 
 
 def arithmetic_value(instruction):
     """
-    Determines the machine code value of an arithmetic or logic instruction. Returns this value if the instruction
-    is an arithmetic/logic command. If not, then None is returned.
+    Determines the machine code value of an arithmetic or logic instruction. The instruction must be an
+    arithmetic/logic command, and its registers are not checked, since the parser has already validated them.
+    The value is looked up in ARITHMETIC_VALUES, which is generated by arithmetic_encoding.
 
-    Raises:
-        CompilerException: If the register arguments to the instruction are invalid
     Args:
         instruction (list): The instruction to determine the value of
 
     Returns:
-        The machine code value of this instruction if it is an arithmetic/logic instruction. Otherwise None
+        The machine code value of this instruction
+    """
+    return ARITHMETIC_VALUES[tuple(instruction)]
+
+
+def arithmetic_encoding(instruction):
     """
-    if instruction[0] not in ARITHMETIC:
-        return None
+    Computes the machine code value of an arithmetic or logic instruction from its command and registers. This is
+    only used to generate ARITHMETIC_VALUES, so use arithmetic_value to encode instructions.
 
+    Args:
+        instruction (tuple): The instruction to determine the value of
+
+    Returns:
+        The machine code value of this instruction
+    """
     dst, arg1 = instruction[1], instruction[2]
 
     x = int(dst == 'X')
@@ -131,3 +133,20 @@ def arithmetic_value(instruction):
         opcode = BINARY[instruction[0]]
 
     return 0x40 | x << 5 | m << 4 | opcode
+
+
+# Machine code of every arithmetic/logic instruction with a destination of 'X' or 'L', and every combination of 'X', 'L'
+# and 'M' as arguments, keyed by the instruction as a tuple. Unary instructions have 1 argument. This includes
+# combinations the parser rejects (such as 'add X L M'), which are never looked up
+ARITHMETIC_VALUES = {instruction: arithmetic_encoding(instruction) for instruction in
+                     [(command, dst, arg1) for command in UNARY['X'] for dst in 'XL' for arg1 in 'XLM'] +
+                     [(command, dst, arg1, arg2) for command in ['sub', *BINARY] for dst in 'XL'
+                      for arg1 in 'XLM' for arg2 in 'XLM']}
+
+
+# Maps each command to the function used to encode it, so each instruction is encoded with a single lookup
+DISPATCH = {command: (lambda instruction, value=value: value) for command, value in FIXED.items()}
+DISPATCH['ldb'] = lambda instruction: instruction[1] | 0x80
+DISPATCH['mov'] = mov_value
+DISPATCH.update({command: output_value for command in OUTPUT})
+DISPATCH.update({command: arithmetic_value for command in ARITHMETIC})
@@ -1,5 +1,6 @@
-from hadloc.assembler.parser import write_load
+from hadloc.assembler.parser import LOAD_COMMANDS, write_load
 from hadloc.error import CompilerException, ExceptionType
+from bisect import bisect_left
 from copy import deepcopy
 
 from hadloc.text_utils import PositionedString
@@ -81,12 +82,17 @@ def encode_labels(instructions: list[list[str | int]], labels: dict[str, int]):
         raise CompilerException(ExceptionType.NAME, PositionedString.empty_string(),
                                 'Not able to resolve label locations')
     else:
-        for i in range(len(instructions)-1, -1, -1):
-            instruction = instructions[i]
+        # The resolved instructions are built up in a new list and copied back in a single slice assignment, rather than
+        # splicing each load into the list, which would shift every instruction after it
+        resolved = []
+        for instruction in instructions:
             # checking that the argument is in finished is purely to filter out integer arguments. If the argument is
             # not an integer it should be in finished
-            if (instruction[0] == 'ldu' or instruction[0] == 'ldb') and instruction[1] in finished:
-                instructions[i:i+1] = write_load(instruction[0], finished[instruction[1]])
+            if instruction[0] in LOAD_COMMANDS and instruction[1] in finished:
+                resolved += write_load(instruction[0], finished[instruction[1]])
+            else:
+                resolved.append(instruction)
+        instructions[:] = resolved
 
 
 def find_lengths(label_data: dict[str, dict[str, int]], finished: dict[str, int], instructions: list[list[str | int]]):
@@ -192,21 +198,23 @@ def update_minmax(label_data: dict[str, dict[str, int]], instructions: list[list
         label_data: Dictionary containing the relevant information for all the labels
         instructions: List of instructions generated by the parser
     """
-    for label, pos in label_data.items():
-        pos['min'] = pos['max'] = pos['orig']
-
-    for i in range(len(instructions)):
-        instruction = instructions[i]
+    # Positions of the load instructions that may (or must) assemble into 2 machine code instructions. These are found
+    # in order, so the lists are sorted
+    may_extend = []
+    must_extend = []
+    for i, instruction in enumerate(instructions):
         # Don't need to check ldu instructions, because labels have to fit in be 15 bits, meaning a ldu is guaranteed
         # be one instruction
-        if instruction[0] == 'ldb':
-            if type(instruction[1]) == str:
-                if label_data[instruction[1]]['len'] == 0:
-                    for label, pos in label_data.items():
-                        if pos['orig'] > i:
-                            pos['max'] += 1
-                elif label_data[instruction[1]]['len'] == 2:
-                    for label, pos in label_data.items():
-                        if pos['orig'] > i:
-                            pos['min'] += 1
-                            pos['max'] += 1
+        if instruction[0] == 'ldb' and type(instruction[1]) == str:
+            length = label_data[instruction[1]]['len']
+            if length == 0:
+                may_extend.append(i)
+            elif length == 2:
+                may_extend.append(i)
+                must_extend.append(i)
+
+    # Each label is moved along by one for every extended load before it, which is counted with a binary search,
+    # rather than updating every label for each load
+    for pos in label_data.values():
+        pos['min'] = pos['orig'] + bisect_left(must_extend, pos['orig'])
+        pos['max'] = pos['orig'] + bisect_left(may_extend, pos['orig'])
@@ -1,6 +1,20 @@
-from hadloc.assembler.tokenizer import Token, TokenType
+import operator
+
+from hadloc.assembler.tokenizer import END_TOKEN, Token, TokenType
 from hadloc.error import CompilerException, ExceptionType
-from hadloc.text_utils import CodeObject, PositionedString, add
+from hadloc.text_utils import CodeObject, PositionedString
+
+# Number of register arguments taken by each instruction with register arguments, so the arguments of an instruction
+# can be verified with a single lookup
+REGISTER_ARGUMENTS = {'mov': 2, 'opd': 1, 'opi': 1, 'not': 2, 'neg': 2, 'inc': 2, 'dec': 2,
+                      'sub': 3, 'and': 3, 'or': 3, 'add': 3}
+NO_ARGUMENT_COMMANDS = ('jmp', 'jgt', 'jeq', 'jlt', 'jge', 'jle', 'jne', 'jcs', 'jis', 'hlt', 'nop', 'ics', 'icc')
+LOAD_COMMANDS = frozenset({'ldb', 'ldu'})
+# Binary operators allowed in constant expressions, mapped to their (precedence, function). Higher precedence operators
+# bind more tightly
+BINARY_OPERATORS = {'|': (1, operator.or_), '&': (2, operator.and_), '+': (3, operator.add), '-': (3, operator.sub)}
+# Operators that may start a unary expression
+UNARY_OPERATORS = frozenset({'-', '!'})
 
 
 class Parser:
@@ -33,6 +47,7 @@ class Parser:
 
     Attributes:
         tokens: Stores the tokens passed in as an argument
+        token_count: The number of tokens, which is fixed, so it is only computed once
         index: The index within the current line of the current token being parsed
         labels: A dictionary containing the labels as keys, and the line number of the label as the value. The line
             number is the line number of the instructions generated from parsing (not the final line number)
@@ -40,26 +55,35 @@ class Parser:
             the value. Unlike the labels' dictionary, these values are final.
         instructions: List of instructions, where each instruction is a list of strings or ints. These instructions are
             guaranteed to be valid, so no error checking is required
-        used_labels: List of the labels used in the code. These are the labels that are used in load instructions, NOT
-            the labels that are created. If there is a label in this list, that is not in the labels' dictionary, then
-            there is a CompilerException, as an undefined label was used. Conversely, if there is a label that is not
-            in this list, then a warning is created as there is an unused label
+        used_labels: Dictionary of the labels used in the code, where the keys are the names of the labels, and the
+            values are the first token that used them, in the order they were used. These are the labels that are used
+            in load instructions, NOT the labels that are created. If there is a label in this dictionary, that is not
+            in the labels' dictionary, then there is a CompilerException, as an undefined label was used. Conversely,
+            if there is a label that is not in this dictionary, then a warning is created as there is an unused label
         used_definitions: Serves an identical purpose to used_labels, but for definitions
         warnings: List of warnings generated by the parser. Warnings are issues with the code that do not prevent
             assembly. Warnings are given if there are definitions or labels that are unused
+        instruction_parsers: Dictionary mapping each instruction keyword to the function used to parse it
 
     Raises:
         CompilerException: If there are any errors with the code
     """
     def __init__(self, tokens: list[Token]):
         self.tokens = tokens
+        self.token_count = len(tokens)
         self.index = 0
         self.labels: dict[CodeObject, int] = {}
         self.definitions: dict[CodeObject, int] = {}
         self.instructions: list[list[str | int]] = []
-        self.used_labels: set[CodeObject] = set()
-        self.used_definitions: set[CodeObject] = set()
+        self.used_labels: dict[str, CodeObject] = {}
+        self.used_definitions: dict[str, CodeObject] = {}
         self.warnings: list[str] = []
+        self.instruction_parsers = {command: self.parse_no_argument_instruction for command in NO_ARGUMENT_COMMANDS}
+        self.instruction_parsers.update({command: self.parse_load_instruction for command in ('ldb', 'ldu', 'lda')})
+        self.instruction_parsers['mov'] = self.parse_move_instruction
+        self.instruction_parsers.update({command: self.parse_output_instruction for command in ('opd', 'opi')})
+        self.instruction_parsers.update({command: self.parse_arithmetic_logic_instruction
+                                         for command in ('not', 'neg', 'inc', 'dec', 'sub', 'and', 'or', 'add')})
 
     def run(self) -> tuple[list[list[str | int]], list[str], dict[str, int]]:
         """
@@ -83,10 +107,12 @@ class Parser:
         self.instructions.append(['hlt'])
 
         # Check that all labels are defined. Don't need this for definitions as they must be defined before they are
-        # used, so they are caught during parsing
-        for label in self.used_labels:
-            if label.value not in self.labels:
-                raise CompilerException(ExceptionType.NAME, label, f"The identifier '{label}' has not been defined")
+        # used, so they are caught during parsing. The undefined labels are found with a single set difference, and the
+        # first one used is reported
+        undefined = self.used_labels.keys() - self.labels.keys()
+        if undefined:
+            label = next(label for name, label in self.used_labels.items() if name in undefined)
+            raise CompilerException(ExceptionType.NAME, label, f"The identifier '{label}' has not been defined")
 
         # Check if there are any labels or definitions that weren't used
         for label in self.labels:
@@ -111,9 +137,8 @@ class Parser:
         Returns: the token offset by a given amount from the token currently being parsed, or an INSTRUCTION_END token
             if this is outside the range of the tokens list
         """
-        return self.tokens[self.index + offset] \
-            if self.index + offset < len(self.tokens) \
-            else Token(TokenType.INSTRUCTION_END)
+        index = self.index + offset
+        return self.tokens[index] if index < self.token_count else END_TOKEN
 
     def end_instruction(self, required: bool = False):
         """
@@ -124,10 +149,11 @@ class Parser:
         Args:
             required: whether it is required to end the instruction
         """
-        if self.token().token_type is TokenType.INSTRUCTION_END:
+        token = self.token()
+        if token.token_type is TokenType.INSTRUCTION_END:
             self.index += 1
         elif required:
-            raise CompilerException(ExceptionType.SYNTAX, self.token(), 'Unexpected Token')
+            raise CompilerException(ExceptionType.SYNTAX, token, 'Unexpected Token')
 
     def add_instruction(self, instruction: list[PositionedString | str | int | None]):
         """
@@ -150,37 +176,21 @@ class Parser:
         self.instructions.append(raw_instruction)
         self.end_instruction(required=True)
 
-    def match(self, *matches: str | TokenType) -> Token | None:
-        """
-        Advances over the current token only if matches one of the arguments. If a token is advanced past, the
-        token is returned, otherwise None is returned
-        Args:
-            *matches: values to match against the current token. Can be string (match against token value) or TokenType
-                (match against token type)
-
-        Returns: The token advanced over, or None if no token was matched
-        """
-        for match in matches:
-            if self.token() == match:
-                self.index += 1
-                return self.token(-1)
-
     def parse_program(self):
         """
         Parses the entire list of tokens.
-        Creates the labels dictionary and the used_labels list.
+        Creates the labels dictionary and the used_labels dictionary.
         Creates the instruction list and verifies the structure of the instructions are correct.
         See documentation for Parser for more information on what parsing a program achieves.
 
         Raises:
             CompilerException: If there is an error in the code
         """
-        while self.index < len(self.tokens):
-            if self.parse_definition():
-                continue
-
-            # Label and instruction can be on same line, so parse these together
-            if self.parse_label() or self.parse_instruction():
+        while self.index < self.token_count:
+            # Most lines are instructions, so they are tried first. Each parser rejects a line by the type of its first
+            # token, and only one of them can accept it, so the order does not change what is parsed. Labels advance
+            # over the end of the line optionally, so a label and instruction can be on same line
+            if self.parse_instruction() or self.parse_label() or self.parse_definition():
                 continue
 
             # If none of the above parsed successfully, there must be an error
@@ -199,12 +209,12 @@ class Parser:
         Raises:
             CompilerException: If parsing the label succeeds, but the identifier is defined elsewhere
         """
-        if self.token().token_type is TokenType.IDENTIFIER and self.token(1).value == ':':
-            if self.token().value in self.labels or self.token().value in self.definitions:
-                raise CompilerException(ExceptionType.NAME, self.token(),
-                                        f"The identifier '{self.token()}' has multiple definitions")
+        token = self.token()
+        if token.token_type is TokenType.IDENTIFIER and self.token(1).value == ':':
+            if token.value in self.labels or token.value in self.definitions:
+                raise CompilerException(ExceptionType.NAME, token, f"The identifier '{token}' has multiple definitions")
 
-            self.labels[self.token()] = len(self.instructions)
+            self.labels[token] = len(self.instructions)
             self.index += 2
             self.end_instruction()
             return True
@@ -219,14 +229,14 @@ class Parser:
         Raise:
             CompilerException: If parsing the definition succeeds, but the identifier is defined elsewhere
         """
-        if not (self.token().token_type is TokenType.KEYWORD and self.token().value == 'define'):
+        token = self.token()
+        if not (token.token_type is TokenType.KEYWORD and token.value == 'define'):
             return False
 
-        if not self.token(1).token_type is TokenType.IDENTIFIER:
-            raise CompilerException(ExceptionType.ARG, self.token(1).value,
-                                    "Expected identifier after a 'define' keyword")
-
         name = self.token(1)
+        if name.token_type is not TokenType.IDENTIFIER:
+            raise CompilerException(ExceptionType.ARG, name.value, "Expected identifier after a 'define' keyword")
+
         if name.value in self.labels or name.value in self.definitions:
             raise CompilerException(ExceptionType.NAME, name, f"The identifier '{name}' has multiple definitions")
 
@@ -265,24 +275,32 @@ class Parser:
             CompilerException:
                 - The instruction is invalid in any way
         """
-        if self.token().token_type is not TokenType.KEYWORD:
+        command = self.token()
+        if command.token_type is not TokenType.KEYWORD:
+            return False
+
+        # The command is looked up once, and the parser for that command is given the command token, already advanced
+        # past
+        parser = self.instruction_parsers.get(command.value)
+        if parser is None:
             return False
 
-        return self.parse_no_argument_instruction() or self.parse_load_instruction() or \
-            self.parse_move_instruction() or self.parse_output_instruction() or \
-            self.parse_arithmetic_logic_instruction()
+        self.index += 1
+        parser(command)
+        return True
 
-    def parse_no_argument_instruction(self) -> bool:
+    def parse_no_argument_instruction(self, command: Token):
         """
         Parses any instruction that has no arguments
-        Returns: True if an instruction was parsed
+
+        Args:
+            command: The command token of the instruction
         """
-        command = self.match('jmp', 'jgt', 'jeq', 'jlt', 'jge', ' jle', 'jne', 'jcs', 'jis', 'hlt', 'nop', 'ics', 'icc')
-        if command is not None:
-            self.add_instruction([command])
-        return command is not None
+        # The instruction is just the command, so it is added directly rather than converted by add_instruction
+        self.instructions.append([command.value])
+        self.end_instruction(required=True)
 
-    def parse_load_instruction(self) -> bool:
+    def parse_load_instruction(self, command: Token):
         """
         Parses the ldb, ldu and lda instructions. lda instructions are converted to
 
@@ -291,15 +309,14 @@ class Parser:
             ldb arg
 
         'ldb' and 'ldu' instructions are compiled using the Parser.write_load() function.
-        Returns: True if a command was parsed
+
+        Args:
+            command: The command token of the instruction
+
         Raises:
             CompilerException:
-                - If the instruction is a load instruction but the argument is not a valid expression
+                - If the argument is not a valid expression
         """
-        command = self.match('ldb', 'ldu', 'lda')
-        if command is None:
-            return False
-
         try:
             value = self.parse_constant_expression().value
         except CompilerException as ce:
@@ -309,29 +326,27 @@ class Parser:
 
         if command == 'lda':
             self.instructions += write_load('ldu', value)
-            self.add_instruction(['mov', 'L', 'H'])
+            self.instructions.append(['mov', 'L', 'H'])
             self.instructions += write_load('ldb', value)
         else:
             self.instructions += write_load(command.value, value)
-        return True
 
-    def parse_move_instruction(self) -> bool:
+    def parse_move_instruction(self, command: Token):
         """
         Parses a move instruction. Generates a warning if source and destination are equal. This has no effect, so is
         replaced with a nop
-        Returns: True if an instruction was parsed
-        """
-        if self.match('mov') is None:
-            return False
 
-        src, dst = self.verify_registers('mov', 2)
+        Args:
+            command: The command token of the instruction
+        """
+        src, dst = self.verify_registers(command, REGISTER_ARGUMENTS['mov'])
         if src == dst:
             self.warnings.append(
                 f"Move command on line {src.line()} used with '{src}' as the source and destination register. "
                 f"This has no effect and has been replaced with 'nop'"
             )
             self.add_instruction(['nop'])
-            return True
+            return
 
         if dst == 'I':
             raise CompilerException(ExceptionType.ARG, dst,
@@ -341,19 +356,16 @@ class Parser:
             raise CompilerException(ExceptionType.ARG, src,
                                     "Cannot move out of the 'H' register. The 'H' register write only")
 
-        self.add_instruction(['mov', src, dst])
-        return True
+        self.add_instruction([command, src, dst])
 
-    def parse_output_instruction(self) -> bool:
+    def parse_output_instruction(self, command: Token):
         """
         Parses an output instruction
-        Returns: True if an instruction was parsed
-        """
-        command = self.match('opd', 'opi')
-        if command is None:
-            return False
 
-        src, = self.verify_registers(command, 1)
+        Args:
+            command: The command token of the instruction
+        """
+        src, = self.verify_registers(command, REGISTER_ARGUMENTS[command.value])
         if src in ['Y', 'H']:
             raise CompilerException(
                 ExceptionType.ARG, src,
@@ -361,21 +373,17 @@ class Parser:
             )
 
         self.add_instruction([command, src])
-        return True
 
-    def parse_arithmetic_logic_instruction(self) -> bool:
+    def parse_arithmetic_logic_instruction(self, command: Token):
         """
         Parses an arithmetic or logic instruction
-        Returns: True if an instruction was parsed
-        """
-        command = self.match('not', 'neg', 'inc', 'dec', 'sub', 'and', 'or', 'add')
-        if command is None:
-            return False
 
-        if command in ['not', 'neg', 'inc', 'dec']:
-            (dst, arg1), arg2 = self.verify_registers(command, 2), None
-        else:
-            dst, arg1, arg2 = self.verify_registers(command, 3)
+        Args:
+            command: The command token of the instruction
+        """
+        registers = self.verify_registers(command, REGISTER_ARGUMENTS[command.value])
+        # Unary instructions have no second argument
+        dst, arg1, arg2 = registers if len(registers) == 3 else (*registers, None)
 
         if dst not in ['X', 'L']:
             raise CompilerException(ExceptionType.ARG, dst,
@@ -397,9 +405,8 @@ class Parser:
                                     "Arithmetic and logic instructions must have at least one argument be 'X'")
 
         self.add_instruction([command, dst, arg1, arg2])
-        return True
 
-    def verify_registers(self, command: Token | str, count: int) -> tuple[Token, ...]:
+    def verify_registers(self, command: Token, count: int) -> tuple[Token, ...]:
         """
         Intended for use when parsing an instruction that has register arguments. It simply checks if the next tokens
         are all register tokens, where count specifies how many tokens it checks. Raises helpful exceptions for the
@@ -413,10 +420,14 @@ class Parser:
             CompilerException:
                 - If a token checked is not a REGISTER type
         """
-        tokens = tuple(self.token(i) for i in range(count))
+        # The arguments are taken as a single slice of the tokens, padded with END_TOKEN if the slice goes past the end
+        tokens = tuple(self.tokens[self.index:self.index + count])
+        if len(tokens) < count:
+            tokens += (END_TOKEN,) * (count - len(tokens))
         for i, token in enumerate(tokens):
             if token.token_type is TokenType.INSTRUCTION_END:
-                raise CompilerException(ExceptionType.ARG, command + self.token(i - 1),
+                # The error spans from the command to the last argument given, if there is one
+                raise CompilerException(ExceptionType.ARG, command + self.token(i - 1) if i > 0 else command,
                                         f"Expected {count} register arguments in '{command}' instruction")
 
             if token.token_type is not TokenType.REGISTER:
@@ -455,72 +466,77 @@ class Parser:
         being used on labels. If a constant expression is not a label, it will be able to be evaluated completely, since
         all definitions must be defined before they are used.
 
-        Each non-terminal above will be implemented in its own function, which returns the CodeObject representing the
-        parsed expression. If it fails to parse an expression, an exception will be raised, as this is only used when
-        an expression is required
+        The three binary non-terminals are all implemented by parse_binary_expression, using precedence climbing, while
+        the others are implemented in their own function. Each returns the CodeObject representing the parsed
+        expression. If it fails to parse an expression, an exception will be raised, as this is only used when an
+        expression is required
 
         Returns:
             (token_type, value): token_type is the type of the expression. If it is a label, then type='identifier',
                 otherwise type='integer'. value is the value of the expression. This is returned as a CodeObject, which
                 either contains an integer, or a string, if there was a label.
         """
-        if self.token().token_type is TokenType.IDENTIFIER and self.token().value not in self.definitions:
-            self.used_labels.add(self.token())
+        token = self.token()
+        if token.token_type is TokenType.IDENTIFIER and token.value not in self.definitions:
+            self.used_labels.setdefault(token.value, token)
             self.index += 1
-            return self.token(-1)
-        return self.parse_or_expression()
+            return token
+        return self.parse_binary_expression()
 
-    def parse_or_expression(self) -> CodeObject:
-        """See docstring for parse_constant_expression"""
-        expression = self.parse_and_expression()
-        while self.token().value == '|':
-            expression += self.token()
-            self.index += 1
-            expression = add(expression, self.parse_and_expression(), lambda x, y: x | y)
-        return expression
+    def parse_binary_expression(self, precedence: int = 1) -> CodeObject:
+        """
+        Parses an expression containing only binary operators with a precedence of at least the given precedence. The
+        operators and their precedences are given by BINARY_OPERATORS. With the default precedence, this parses a
+        BitwiseOrExpression. See docstring for parse_constant_expression
 
-    def parse_and_expression(self) -> CodeObject:
-        """See docstring for parse_constant_expression"""
-        expression = self.parse_arithmetic_expression()
-        while self.token().value == '&':
-            expression += self.token()
-            self.index += 1
-            expression = add(expression, self.parse_arithmetic_expression(), lambda x, y: x & y)
-        return expression
+        Args:
+            precedence: The minimum precedence of the operators to parse
 
-    def parse_arithmetic_expression(self) -> CodeObject:
-        """See docstring for parse_constant_expression"""
+        Returns: The CodeObject representing the parsed expression
+        """
         expression = self.parse_unary_expression()
+        # The text of the operators and operands are collected, and joined once at the end
+        parts = [expression]
+        value = expression.value
         token = self.token()
-        while token.value in ['+', '-']:
-            expression += token
+        while token.value in BINARY_OPERATORS and BINARY_OPERATORS[token.value][0] >= precedence:
+            operator_precedence, function = BINARY_OPERATORS[token.value]
             self.index += 1
-            if token.value == '+':
-                expression = add(expression, self.parse_unary_expression(), lambda x, y: x + y)
-            elif token.value == '-':
-                expression = add(expression, self.parse_unary_expression(), lambda x, y: x - y)
+            # Operators of the same precedence are left associative, so the right operand only contains operators that
+            # bind more tightly
+            operand = self.parse_binary_expression(operator_precedence + 1)
+            parts += token, operand
+            value = function(value, operand.value)
             token = self.token()
-        return expression
+
+        if len(parts) == 1:
+            return expression
+        return CodeObject(value, PositionedString.join(parts))
 
     def parse_unary_expression(self) -> CodeObject:
         """See docstring for parse_constant_expression"""
-        minus = False
-        invert = False
-        text = PositionedString.empty_string()
-        while self.token().value in ['-', '!']:
-            if self.token().value == '-':
-                minus = not minus
-            elif self.token().value == '!':
-                invert = not invert
-            text += self.token()
+        # Bit 0 of flags is set if the value is negated, and bit 1 is set if it is inverted. Repeated operators cancel
+        flags = 0
+        parts = []
+        token = self.token()
+        while token.value in UNARY_OPERATORS:
+            flags ^= 1 if token.value == '-' else 2
+            parts.append(token)
             self.index += 1
+            token = self.token()
+
         expression = self.parse_primary()
-        result = CodeObject(expression.value, text + expression)
-        if minus:
-            result.value = -result.value
-        if invert:
-            result.value = ~result.value
-        return result
+        # Without any unary operators, the primary is already the result, so no new CodeObject is needed
+        if not parts:
+            return expression
+        parts.append(expression)
+
+        value = expression.value
+        if flags & 1:
+            value = -value
+        if flags & 2:
+            value = ~value
+        return CodeObject(value, PositionedString.join(parts))
 
     def parse_primary(self) -> CodeObject:
         """See docstring for parse_constant_expression"""
@@ -528,7 +544,7 @@ class Parser:
         if token.token_type is TokenType.IDENTIFIER:
             if token.value in self.definitions:
                 self.index += 1
-                self.used_definitions.add(token)
+                self.used_definitions.setdefault(token.value, token)
                 return CodeObject(self.definitions[token.value], token)
             raise CompilerException(
                 ExceptionType.NAME, token,
@@ -536,7 +552,7 @@ class Parser:
                 f"labels cannot be used in expressions"
             )
 
-        if self.token().token_type is TokenType.INTEGER:
+        if token.token_type is TokenType.INTEGER:
             if not -32768 <= token.value < 65536:
                 raise CompilerException(ExceptionType.VALUE, token,
                                         "Integer literals must be in the range -32768 to 65535 (inclusive)")
@@ -545,14 +561,15 @@ class Parser:
 
         if token == '(':
             self.index += 1
-            expression = self.parse_or_expression()
-            if self.token().value == ')':
+            expression = self.parse_binary_expression()
+            closing = self.token()
+            if closing.value == ')':
                 self.index += 1
-                return CodeObject(expression.value, token + expression + self.token(-1))
-            if self.token().token_type is TokenType.INSTRUCTION_END:
+                return CodeObject(expression.value, PositionedString.join((token, expression, closing)))
+            if closing.token_type is TokenType.INSTRUCTION_END:
                 raise CompilerException(ExceptionType.SYNTAX, token, 'Unmatched bracket')
             else:
-                raise CompilerException(ExceptionType.SYNTAX, self.token(), 'Invalid Syntax. Expected closing bracket')
+                raise CompilerException(ExceptionType.SYNTAX, closing, 'Invalid Syntax. Expected closing bracket')
 
         if token is None:
             raise CompilerException(
@@ -579,7 +596,7 @@ def write_load(instruction: str, value: int) -> list[list[str | int]]:
     If the argument is an integer and the eighth bit is a 1, then this will write
         ldb !arg      or      ldu !arg
         not L L               not L L
-    Where !arg is the 1's complement negation of the argument
+    Where !arg is the 1's complement negation of the argument. The instructions for each byte are taken from LOADS
     Args:
         instruction: string indicating the type of the load instruction. Can be either 'ldu' for load
             upper byte, or 'ldb' for load lower byte
@@ -590,16 +607,12 @@ def write_load(instruction: str, value: int) -> list[list[str | int]]:
         # Leave labels as they are, since they will be resolved in the label_encoder
         return [[instruction, value]]
 
-    instructions = []
     # select the upper or lower 8 bits depending on the value of instr
     value = value & 0xFF if instruction == 'ldb' else (value >> 8) & 0xFF
+    return list(LOADS[value])
 
-    # if the eighth bit is zero, simple ldb instruction will work
-    if 0 <= value <= 127:
-        instructions.append(['ldb', value])
 
-    # Otherwise we have to load the 1's complement of the argument and the invert it
-    else:
-        instructions.append([instruction, ~value & 0xFF])
-        instructions.append(['not', 'L', 'L'])
-    return instructions
+# The instructions that load each possible byte. If the eighth bit is zero, a simple ldb instruction will work.
+# Otherwise, we have to load the 1's complement of the byte and then invert it. The instructions are never modified
+# once created, so they are shared between every load of the same byte
+LOADS = tuple([['ldb', byte]] if byte <= 127 else [['ldb', ~byte & 0xFF], ['not', 'L', 'L']] for byte in range(256))
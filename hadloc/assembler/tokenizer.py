@@ -1,4 +1,6 @@
 import os
+import re
+import sys
 from enum import Enum, auto
 from io import TextIOWrapper
 from typing import Optional
@@ -6,14 +8,28 @@ from typing import Optional
 from hadloc import error
 
 from hadloc.error import CompilerException, ExceptionType
-from hadloc.text_utils import CodeObject, LinedCode, PositionedString
+from hadloc.text_utils import CodeObject, PositionedString
+from hadloc.text_utils.positioned_string import Coordinate
 
-keywords = ['lda', 'ldb', 'ldu', 'mov', 'jmp', 'jlt', 'jeq', 'jgt', 'jle', 'jge', 'jne', 'nop', 'jis', 'jcs', 'opd',
-            'opi', 'hlt', 'not', 'neg', 'inc', 'dec', 'sub', 'and', 'or', 'add', 'ics', 'icc', 'define']
+# These are only used for membership tests, so they are sets, allowing each word or character to be classified with a
+# single hash lookup
+keywords = frozenset({'lda', 'ldb', 'ldu', 'mov', 'jmp', 'jlt', 'jeq', 'jgt', 'jle', 'jge', 'jne', 'nop', 'jis', 'jcs',
+                      'opd', 'opi', 'hlt', 'not', 'neg', 'inc', 'dec', 'sub', 'and', 'or', 'add', 'ics', 'icc',
+                      'define'})
 
-registers = ['L', 'H', 'M', 'I', 'X', 'Y']
+registers = frozenset({'L', 'H', 'M', 'I', 'X', 'Y'})
 
-symbols = [':', '+', '-', '&', '|', '!', '(', ')']
+symbols = frozenset({':', '+', '-', '&', '|', '!', '(', ')'})
+
+# Patterns used to scan over runs of characters in a single call, rather than one character at a time. WHITESPACE and
+# WORD may match an empty string, so they always succeed. WHITESPACE also skips a line comment ('//' to the end of the
+# line) following the whitespace, as the text is scanned one line at a time
+WHITESPACE = re.compile(r'\s*(?://.*)?')
+WORD = re.compile(r'\w*')
+BINARY_DIGITS = re.compile(r'[01]+')
+OCTAL_DIGITS = re.compile(r'[0-7]*')
+DECIMAL_DIGITS = re.compile(r'[0-9]+')
+HEX_DIGITS = re.compile(r'[0-9A-Fa-f]+')
 
 
 class TokenType(Enum):
@@ -25,43 +41,83 @@ class TokenType(Enum):
     INSTRUCTION_END = auto()
 
 
+# The type of every keyword and register, so a word is classified with a single lookup. Any other word is an identifier
+WORD_TYPES = {word: TokenType.KEYWORD for word in keywords} | {word: TokenType.REGISTER for word in registers}
+
+
 class Token(CodeObject):
+    __slots__ = ('token_type',)
+
     def __init__(self, token_type: TokenType, value: CodeObject = CodeObject.none()):
         super().__init__(value.value, value)
         self.token_type = token_type
 
+    @classmethod
+    def create(cls, token_type: TokenType, value: int | str, text: str, coordinates: list[Coordinate]) -> 'Token':
+        """
+        Creates a token with the given value, text and coordinates. Equivalent to
+        Token(token_type, CodeObject(value, PositionedString(text, coordinates))), without creating the intermediate
+        CodeObject and PositionedString
+
+        Args:
+            token_type: The type of the token
+            value: The value of the token
+            text: The text from the code that generated the token
+            coordinates: The coordinates of each character of text
+
+        Returns: The token created
+        """
+        token = cls.__new__(cls)
+        PositionedString.__init__(token, text, coordinates)
+        token.value = value
+        token.token_type = token_type
+        return token
+
+
+# Tokens are never modified, so every instruction end token (including the one the parser returns when a token past
+# the end of the token list is requested) is a single shared instance
+END_TOKEN = Token(TokenType.INSTRUCTION_END)
+
 
 class Tokenizer:
     """
-    Used for tokenizing an assembly file. Takes the raw text from the assembly file as a string, and generates a 2
-    dimensional list of tokens, stored in the variable tokens. The tokens list is structured so that each line in the
-    code is in a separate row of the 2 dimensional list. Each row contains a series of tokens. Each token contains a
-    token type and a value
+    Used for tokenizing an assembly file. Takes the raw text from the assembly file as a string, and generates a list
+    of tokens, stored in the variable tokens. An INSTRUCTION_END token is placed between the tokens of each line in the
+    code. Each token contains a token type and a value
 
     There are 6 types of token: 'keyword', 'identifier', 'register', 'symbol', 'integer', 'instruction end'
 
     More information about what constitutes each type of token can be found in the documentation for the functions
     that tokenize them (e.g. Tokenizer.tokenize_label()).
 
+    The text is scanned as plain strings, one line at a time, using the compiled patterns above to advance over whole
+    runs of characters at once. PositionedStrings are only created for the text of each token, and for errors.
+
     Args:
         file: An open file of the file to be tokenized. Must be in the mode 'r'
 
     Attributes:
-        code (LinedCode): The code that is being tokenized. This object stored the current location within the text
-            that is currently being tokenized.
-        tokens: A two-dimensional list containing the tokens on each line. Each token is stored
-            in a tuple containing the type of the token as a string, and the value of the token as a CodeObject
+        lines: The lines of the code that is being tokenized, without line breaks
+        line: The index of the line currently being tokenized
+        text: The text of the line currently being tokenized
+        offset: The index within text of the next character to be tokenized
+        token_line: The index of the line of the most recently added token, or -1 if no tokens have been added
+        tokens: A list containing the tokens of the code. Each token contains the type of the token, and the value of
+            the token as a CodeObject
 
     Raises:
         CompilerException: If there is a syntax error in the assembly code, a Compiler exception will be raised
         containing the location and cause of the error
     """
     def __init__(self, file: TextIOWrapper):
-        text = file.read()
-        error.code = text.splitlines()
+        self.lines = file.read().splitlines()
+        error.code = self.lines
         CompilerException.file_name = os.path.realpath(file.name)
-        self.code = LinedCode(text)
+        self.line = 0
+        self.text = self.lines[0] if len(self.lines) > 0 else ''
+        self.offset = 0
         self.tokens: list[Token] = []
+        self.token_line = -1
         file.close()
 
     def run(self) -> list[Token]:
@@ -71,39 +127,92 @@ class Tokenizer:
         """
         # The code should be a series of alternating tokens and whitespace/comment sections. As such, we start by
         # advancing past any whitespace/comments at the start, before continuously tokenizing a token, and advancing
-        # over whitespace/comment. If we advanced over a line when tokenizing a whitespace/comment, we must check if
-        # there are more tokens before adding a new line, because we may have reached the end of the file.
+        # over whitespace/comment. Skipping whitespace/comments only stops on a line with text remaining, or at the end
+        # of the file, so there are more tokens if and only if there is text left on the current line
         self.skip_whitespace_and_comments()
-        while self.code.has_more():
-            if self.tokenize_int() is None and \
-                    self.tokenize_keyword_identifier_register() is None and \
-                    self.tokenize_symbol() is None:
-                raise CompilerException(ExceptionType.SYNTAX, self.code[0], 'Unexpected character')
+        # The first character of a token determines which tokenizer to use, so only one is tried for each token. Any
+        # character not in DISPATCH can only start a word (non-ASCII letters), or is an unexpected character
+        while self.offset < len(self.text):
+            tokenizer = DISPATCH.get(self.text[self.offset], Tokenizer.tokenize_keyword_identifier_register)
+            if tokenizer(self) is None:
+                raise CompilerException(ExceptionType.SYNTAX, self.char(), 'Unexpected character')
             self.skip_whitespace_and_comments()
         return self.tokens
 
-    def addtoken(self, token_type: TokenType, text: PositionedString, value: Optional[int | str] = None) -> Token:
+    def substring(self, start: int, end: int) -> PositionedString:
+        """
+        Creates a PositionedString of the text on the current line between the given indices. If end is past the end of
+        the line, the substring stops at the end of the line.
+
+        Args:
+            start: The index of the start of the substring (inclusive)
+            end: The index of the end of the substring (exclusive)
+
+        Returns: The substring between the given indices
+        """
+        end = min(end, len(self.text))
+        return PositionedString(self.text[start:end], [Coordinate(self.line, column) for column in range(start, end)])
+
+    def char(self, offset: int = 0) -> PositionedString:
+        """
+        Returns the character at the given offset from the current offset, as a PositionedString. If this is past the
+        end of the line, the null character is returned, with the position of the final character of the line.
+
+        Args:
+            offset: The offset from the current offset of the character
+
+        Returns: The character at the given offset
+        """
+        index = self.offset + offset
+        if index < len(self.text):
+            return self.substring(index, index + 1)
+        return PositionedString('\0', [Coordinate(self.line, len(self.text) - 1)])
+
+    def next_line(self) -> bool:
+        """
+        Moves onto the start of the next line, regardless of whether the current line is completed or not. If there is
+        no next line, the offset is moved to the end of the current line instead.
+
+        Returns: True if there was a next line to move to, otherwise False
         """
-        Helper function to add a new token at the same time as returning True. The text and value arguments are wrapped
-        in a CodeObject. If value is not provided, it will be set to the value of text.
+        if self.line + 1 >= len(self.lines):
+            self.offset = len(self.text)
+            return False
+
+        self.line += 1
+        self.text = self.lines[self.line]
+        self.offset = 0
+        return True
+
+    def addtoken(self, token_type: TokenType, start: int, value: Optional[int | str] = None) -> Token:
+        """
+        Helper function to add a new token at the same time as returning it. The token is made from the text on the
+        current line between start and the current offset, so it must be called after advancing past the token. If
+        value is not provided, it will be set to the text of the token.
 
         Args:
             token_type: The type of the token
-            text: The string from the code that generated the token
+            start: The index on the current line of the first character of the token
             value: The value of the token. This represents the value of the token. For example, if the token is an
                 integer, value would be an int, that is the value of the token. If value is not passed, it gets set to
-                text. This must be an int, or str type
+                the text of the token. This must be an int, or str type
 
         Returns: The token added
         """
-        value = value if value is not None else text.text
-
-        # Add INSTRUCTION_END if the new token is on a different line to the previous one
-        if len(self.tokens) > 0 and self.tokens[-1].line() != text.line():
-            self.tokens.append(Token(TokenType.INSTRUCTION_END))
-
-        self.tokens.append(Token(token_type, CodeObject(value, text)))
-        return self.tokens[-1]
+        # Add INSTRUCTION_END if the new token is on a different line to the previous one. Tokens are only created from
+        # the current line, so the line of the previous token is tracked, rather than read from its coordinates
+        if self.line != self.token_line:
+            if self.token_line >= 0:
+                self.tokens.append(END_TOKEN)
+            self.token_line = self.line
+
+        # The token is created directly from the text and coordinates, rather than from a substring, so only one object
+        # is created for each token
+        text = self.text[start:self.offset]
+        token = Token.create(token_type, value if value is not None else text, text,
+                             [Coordinate(self.line, column) for column in range(start, self.offset)])
+        self.tokens.append(token)
+        return token
 
     def skip_whitespace_and_comments(self):
         """
@@ -111,19 +220,18 @@ class Tokenizer:
         any text after the '//' token but before the end of the line. May skip multiple lines
         """
         while True:
-            if self.code[0].isspace():
-                self.code.advance()
+            self.offset = WHITESPACE.match(self.text, self.offset).end()
 
-            elif self.code.match('//'):
-                self.code.skip_line()
-
-            elif self.code.match('/*'):
-                comment_start = self.code.substring(length=2, end=0, relative=True)
-                while self.code.advance_past('*/') is None:
-                    if not self.code.skip_line():
+            if self.text.startswith('/*', self.offset):
+                comment_start = self.substring(self.offset, self.offset + 2)
+                end = self.text.find('*/', self.offset + 2)
+                while end == -1:
+                    if not self.next_line():
                         raise CompilerException(ExceptionType.SYNTAX, comment_start, 'Comment not closed')
+                    end = self.text.find('*/')
+                self.offset = end + 2
 
-            elif not self.code.advance_line():
+            elif self.offset < len(self.text) or not self.next_line():
                 return
 
     def tokenize_keyword_identifier_register(self) -> Token | None:
@@ -141,25 +249,17 @@ class Tokenizer:
 
         Returns: The token generated, or None if no token was created
         """
-        word = self.code[0]
-        if not word.isalpha() and not word == '_':
+        start = self.offset
+        if not self.text[start].isalpha() and not self.text[start] == '_':
             return None
 
-        for i in range(1, len(self.code)):
-            if self.code[i].isalnum() or self.code[i] == '_':
-                word += self.code[i]
-            else:
-                break
-
-        self.code.advance(len(word))
-
-        if word in keywords:
-            return self.addtoken(TokenType.KEYWORD, word)
+        self.offset = WORD.match(self.text, start + 1).end()
+        word = self.text[start:self.offset]
 
-        if word in registers:
-            return self.addtoken(TokenType.REGISTER, word)
-
-        return self.addtoken(TokenType.IDENTIFIER, word)
+        # Keywords and registers end up as the commands and arguments of instructions, and identifiers are used as the
+        # keys of the label and definition tables, so they are interned, allowing lookups in later stages to match them
+        # by identity
+        return self.addtoken(WORD_TYPES.get(word, TokenType.IDENTIFIER), start, sys.intern(word))
 
     def tokenize_symbol(self) -> Token | None:
         """
@@ -167,10 +267,10 @@ class Tokenizer:
 
         Returns: The token generated, or None if no token was created
         """
-        symbol = self.code.match(*symbols)
-        if symbol is None:
+        if self.text[self.offset] not in symbols:
             return None
-        return self.addtoken(TokenType.SYMBOL, symbol)
+        self.offset += 1
+        return self.addtoken(TokenType.SYMBOL, self.offset - 1)
 
     def tokenize_int(self) -> Token | None:
         """
@@ -182,11 +282,21 @@ class Tokenizer:
 
         Returns: The token generated, or None if no token was created
         """
-        for function in [self.tokenize_bin, self.tokenize_hex,
-                         self.tokenize_oct, self.tokenize_dec, self.tokenize_char]:
-            token = function()
-            if token is not None:
-                return token
+        # The type of integer is determined by its first one or two characters, so only one tokenizer is tried
+        char = self.text[self.offset]
+        if char == '0':
+            prefix = self.text[self.offset + 1:self.offset + 2]
+            if prefix == 'b' or prefix == 'B':
+                return self.tokenize_bin()
+            if prefix == 'x' or prefix == 'X':
+                return self.tokenize_hex()
+            return self.tokenize_oct()
+
+        if '1' <= char <= '9':
+            return self.tokenize_dec()
+
+        if char == "'":
+            return self.tokenize_char()
 
         return None
 
@@ -200,24 +310,17 @@ class Tokenizer:
         Raises:
             CompilerException: If the token starts with '0b' or '0B', but contains no binary digits directly after
         """
-        start = self.code.offset
-        if self.code.match('0b', '0B') is None:
+        start = self.offset
+        if not self.text.startswith(('0b', '0B'), start):
             return None
 
-        if self.code.match('0'):
-            n = 0
-        elif self.code.match('1'):
-            n = 1
-        else:
-            raise CompilerException(ExceptionType.SYNTAX, self.code[0], "Invalid binary literal")
+        digits = BINARY_DIGITS.match(self.text, start + 2)
+        if digits is None:
+            self.offset = start + 2
+            raise CompilerException(ExceptionType.SYNTAX, self.char(), "Invalid binary literal")
 
-        while True:
-            if self.code.match('0'):
-                n *= 2
-            elif self.code.match('1'):
-                n = 2 * n + 1
-            else:
-                return self.addtoken(TokenType.INTEGER, self.code.substring(start=start), n)
+        self.offset = digits.end()
+        return self.addtoken(TokenType.INTEGER, start, int(digits.group(), 2))
 
     def tokenize_oct(self) -> Token | None:
         """
@@ -226,17 +329,12 @@ class Tokenizer:
 
         Returns: The token generated, or None if no token was created
         """
-        start = self.code.offset
-        if not self.code.match('0'):
+        start = self.offset
+        if not self.text.startswith('0', start):
             return None
 
-        n = 0
-        while True:
-            char = self.code.match_range('0', '7')
-            if char is not None:
-                n = 8 * n + int(char)
-            else:
-                return self.addtoken(TokenType.INTEGER, self.code.substring(start=start), n)
+        self.offset = OCTAL_DIGITS.match(self.text, start + 1).end()
+        return self.addtoken(TokenType.INTEGER, start, int(self.text[start:self.offset], 8))
 
     def tokenize_dec(self) -> Token | None:
         """
@@ -245,18 +343,13 @@ class Tokenizer:
 
         Returns: The token generated, or None if no token was created
         """
-        start = self.code.offset
-        char = self.code.match_range('0', '9')
-        if char is None:
+        start = self.offset
+        digits = DECIMAL_DIGITS.match(self.text, start)
+        if digits is None:
             return None
 
-        n = int(char)
-        while True:
-            char = self.code.match_range('0', '9')
-            if char is not None:
-                n = 10 * n + int(char)
-            else:
-                return self.addtoken(TokenType.INTEGER, self.code.substring(start=start), n)
+        self.offset = digits.end()
+        return self.addtoken(TokenType.INTEGER, start, int(digits.group()))
 
     def tokenize_hex(self) -> Token | None:
         """
@@ -269,22 +362,17 @@ class Tokenizer:
         Raises:
             CompilerException: If the token starts with '0x' or '0X', but contains no hexadecimal digits directly after
         """
-        start = self.code.offset
-        if self.code.match('0x', '0X') is None:
+        start = self.offset
+        if not self.text.startswith(('0x', '0X'), start):
             return None
 
-        try:
-            n = int(self.code[0])
-            self.code.advance()
-        except ValueError:
-            raise CompilerException(ExceptionType.SYNTAX, self.code[0], "Invalid hex literal")
+        digits = HEX_DIGITS.match(self.text, start + 2)
+        if digits is None:
+            self.offset = start + 2
+            raise CompilerException(ExceptionType.SYNTAX, self.char(), "Invalid hex literal")
 
-        while True:
-            try:
-                n = 16 * n + int(self.code[0])
-                self.code.advance()
-            except ValueError:
-                return self.addtoken(TokenType.INTEGER, self.code.substring(start=start), n)
+        self.offset = digits.end()
+        return self.addtoken(TokenType.INTEGER, start, int(digits.group(), 16))
 
     def tokenize_char(self) -> Token | None:
         """
@@ -300,23 +388,31 @@ class Tokenizer:
                     in the correct place (i.e. with one character between the 2 quotation marks)
                 - If the character inside the quotation marks is outside the ASCII range 32 to 126 (inclusive)
         """
-        start = self.code.offset
-        if not self.code.match("'"):
+        start = self.offset
+        if not self.text.startswith("'", start):
             return None
 
-        if self.code[1] != "'":
-            if self.code[0] == "'":
-                raise CompilerException(ExceptionType.SYNTAX, self.code.substring(start=-1, end=1, relative=True),
+        if not self.text.startswith("'", start + 2):
+            if self.text.startswith("'", start + 1):
+                raise CompilerException(ExceptionType.SYNTAX, self.substring(start, start + 2),
                                         "Invalid character literal. Cannot have empty character literals")
-            raise CompilerException(ExceptionType.SYNTAX, self.code.substring(start=-1, end=1, relative=True),
+            raise CompilerException(ExceptionType.SYNTAX, self.substring(start, start + 2),
                                     "Invalid character literal. Character has no closing quotation mark")
 
-        c = self.code[0].text
-        self.code.advance(2)
+        c = self.text[start + 1]
+        self.offset = start + 3
         if 32 <= ord(c) <= 126:
-            return self.addtoken(TokenType.INTEGER, self.code.substring(start=start), ord(c))
+            return self.addtoken(TokenType.INTEGER, start, ord(c))
         else:
             raise CompilerException(
-                ExceptionType.SYNTAX, self.code[-2],
+                ExceptionType.SYNTAX, self.char(-2),
                 "Invalid character literal. Only characters with an ASCII value from 32 to 126 are allowed"
             )
+
+
+# Maps the first character of a token to the method used to tokenize it
+DISPATCH = {char: Tokenizer.tokenize_int for char in '0123456789'}
+DISPATCH["'"] = Tokenizer.tokenize_char
+DISPATCH.update({char: Tokenizer.tokenize_symbol for char in symbols})
+DISPATCH.update({char: Tokenizer.tokenize_keyword_identifier_register
+                 for char in '_abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'})
@@ -1,3 +1,6 @@
+from bisect import bisect_right
+from operator import attrgetter
+
 from .positioned_string import PositionedString
 
 
@@ -14,7 +17,7 @@ class Code:
     character out of range of the text, then the null character is returned.
 
     Args:
-        text: The raw text of the code
+        text: The raw text of the code, or the lines of the code if it has already been split into lines
 
     Attributes:
         text: PositionedString containing the code to be processed
@@ -22,7 +25,7 @@ class Code:
         relative to this offset
     """
 
-    def __init__(self, text: str):
+    def __init__(self, text: str | list[str]):
         self.offset = 0
         self.text = PositionedString.create_string(text)
 
@@ -87,13 +90,14 @@ class Code:
         Returns:
             If match was found, returns a PositionedString containing the text advanced past. Otherwise, returns None.
         """
-        for i in range(self.offset, len(self.text)):
-            if self.text[i: i + len(match)] == match:
-                temp = self.text[self.offset: i + len(match)]
-                self.offset = i + len(match)
-                return temp
+        # The match is searched for in the raw text, so no PositionedStrings are created for the text searched over
+        index = self.text.text.find(match, self.offset)
+        if index == -1:
+            return None
 
-        return None
+        temp = self.text[self.offset: index + len(match)]
+        self.offset = index + len(match)
+        return temp
 
     def match(self, *matches: str) -> PositionedString | None:
         """
@@ -104,9 +108,9 @@ class Code:
             *matches: The string to check for
         Returns: The matching string if one of the given string is advanced past, otherwise, None
         """
+        # The raw text is compared directly, so no PositionedStrings are created for strings that don't match
         for match in matches:
-            sub = self.substring(length=len(match), relative=True)
-            if sub == match:
+            if self.text.text.startswith(match, self.offset):
                 self.offset += len(match)
                 return self.substring(end=0, length=len(match), relative=True)
         return None
@@ -160,18 +164,27 @@ class LinedCode(Code):
     while advance_line can be used to move to the next line if and only if the current line is complete
 
     Args:
-        text : The text of the code. Trailing and leading whitespace on each line will be removed
+        text : The text of the code, or the lines of the code if it has already been split into lines. Trailing and
+            leading whitespace on each line will be removed
 
     Attributes:
+        code_text: PositionedString containing all the code. The text attribute contains just the line being processed
+            now, which is a substring of this
+        line_end: The index within code_text of the end of the line being processed now
         remaining_text: Text that is yet to be processed. The text attribute contains just the line being processed
             now, while remaining_text contains everything after that
     """
 
-    def __init__(self, text: str):
+    def __init__(self, text: str | list[str]):
         super().__init__(text)
-        self.remaining_text: PositionedString = self.text
+        self.code_text: PositionedString = self.text
+        self.line_end = 0
         self.skip_line()
 
+    @property
+    def remaining_text(self) -> PositionedString:
+        return self.code_text[self.line_end:]
+
     def advance_line(self) -> bool:
         """
         Advances onto the next line if and only if the current line is completed
@@ -192,23 +205,19 @@ class LinedCode(Code):
             is returned, the current line is still advanced past, it just means that it didn't advance to the next line
             because there isn't a next line
         """
-        if len(self.remaining_text) == 0:
+        if self.line_end == len(self.code_text):
             self.offset = len(self.text)
             return False
 
+        # The coordinates are in order, so the end of the line is found with a binary search on their line numbers,
+        # rather than by checking each character. The code is only substringed once for each line
         self.offset = 0
-        line_number = self.remaining_text.line()
-        if line_number == self.remaining_text.line(-1):
-            self.text = self.remaining_text
-            self.remaining_text = PositionedString.empty_string()
-            return True
-
-        for i, char in enumerate(self.remaining_text):
-            if char.line() != line_number:
-                self.text = self.remaining_text[:i]
-                self.remaining_text = self.remaining_text[i:]
-                return True
+        start = self.line_end
+        line_number = self.code_text.line(start)
+        self.line_end = bisect_right(self.code_text.coordinates, line_number, lo=start, key=attrgetter('line'))
+        self.text = self.code_text[start:self.line_end]
+        return True
 
     def has_more(self) -> bool:
         """Returns True if there are more characters left to process"""
-        return super().has_more() or len(self.remaining_text) > 0
+        return super().has_more() or self.line_end < len(self.code_text)
@@ -17,6 +17,7 @@ class CodeObject(Generic[T], PositionedString):
         text: The text, from the code, that this object derives from
         value: The value of this object. Optional attribute that describes the code
     """
+    __slots__ = ('value',)
 
     def __init__(self, value: T, text: PositionedString):
         super().__init__(text.text, text.coordinates)
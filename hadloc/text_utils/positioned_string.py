@@ -1,8 +1,8 @@
 from dataclasses import dataclass
-from typing import Self, Any
+from typing import Self, Any, Iterable
 
 
-@dataclass
+@dataclass(slots=True)
 class Coordinate:
     """Basic class to hold the position of a character in source code"""
     line: int
@@ -27,6 +27,8 @@ class PositionedString:
         coordinates: List of Coordinate objects of the same length as text, where each element represents the position
             in source code of the corresponding character in text
     """
+    # There is an object for every token, and a Coordinate for every character, so neither has an instance dict
+    __slots__ = ('text', 'coordinates')
 
     def __init__(self, text: str, coordinates: list[Coordinate]):
         """
@@ -39,22 +41,39 @@ class PositionedString:
         self.coordinates = coordinates
 
     @classmethod
-    def create_string(cls, text: str = '') -> Self:
+    def create_string(cls, text: str | list[str] = '') -> Self:
         """
         Creates a PositionedString from a str. Automatically determines the line numbers and character positions based
         on new line characters. Line break characters are removed, as line breaks can be inferred from the coordinates
         Args:
-            text: String representing some text. New line characters are used to determine line numbers of characters
+            text: String representing some text. New line characters are used to determine line numbers of characters.
+                If the text has already been split into lines, the list of lines can be given instead
         """
-        lines = text.splitlines(keepends=False)
-        coordinates = sum(([Coordinate(i, column) for column in range(len(line))] for i, line in enumerate(lines)),
-                          start=[])
+        lines = text.splitlines(keepends=False) if isinstance(text, str) else text
+        coordinates = [Coordinate(i, column) for i, line in enumerate(lines) for column in range(len(line))]
         return cls(''.join(lines), coordinates)
 
     @classmethod
     def empty_string(cls) -> Self:
         return PositionedString("", [])
 
+    @staticmethod
+    def join(strings: Iterable['PositionedString']) -> 'PositionedString':
+        """
+        Concatenates the given strings, in order. This is equivalent to adding the strings together with the +
+        operator, but the text and coordinates are only built once, rather than once for each addition
+        Args:
+            strings: The strings to concatenate
+
+        Returns: A PositionedString of all the given strings concatenated together
+        """
+        text = []
+        coordinates = []
+        for string in strings:
+            text.append(string.text)
+            coordinates += string.coordinates
+        return PositionedString(''.join(text), coordinates)
+
     def isspace(self) -> bool:
         """Returns True if all characters in this string are whitespace"""
         return self.text.isspace()
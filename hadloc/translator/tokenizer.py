@@ -58,10 +58,11 @@ class Tokenizer:
         containing the location and cause of the error
     """
     def __init__(self, file: TextIOWrapper):
-        text = file.read()
-        error.code = text.splitlines()
+        # The lines are shared with the error module, so the text is only split into lines once
+        lines = file.read().splitlines()
+        error.code = lines
         CompilerException.file_name = os.path.realpath(file.name)
-        self.code = LinedCode(text)
+        self.code = LinedCode(lines)
         self.tokens: list[Token] = []
         file.close()
 
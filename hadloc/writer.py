@@ -6,40 +6,73 @@ from .error import FileError
 
 BOX_CHAR = {'HORIZONTAL': '\u2501', 'VERTICAL': '\u2503', 'CROSS': '\u254B', 'UPPER T': '\u2533'}
 
+# Text representation of every possible byte, so bytes can be converted to text by indexing rather than formatting
+BIN_TABLE = tuple('{:08b}\n'.format(byte) for byte in range(256))
+BYTE_TABLE = {'hex': tuple(' {:02X}'.format(byte) for byte in range(256)),
+              'dec': tuple(' {:3}'.format(byte) for byte in range(256))}
+
+# Layout of the tabular displays: (line length, address length, byte length, page length, address format)
+LAYOUT = {'hex': (16, 4, 2, 256, ' {:04X}'), 'dec': (10, 5, 3, 200, ' {:5}')}
+
+
+def page_header(base, first_page):
+    """
+    Creates the header displayed at the top of each page of a hex or decimal display. The header contains the column
+    labels, surrounded by horizontal lines. The top line joins the vertical line below it with a T on the first page,
+    and with a cross on every other page.
+
+    Args:
+        base: The base of the display, either 'hex' or 'dec'
+        first_page: Whether the header is for the first page of the display
+
+    Returns: The header as a string, including the trailing new line
+    """
+    line_length, address_length, byte_length, _, _ = LAYOUT[base]
+    header = BOX_CHAR['HORIZONTAL'] * (address_length + 2) + BOX_CHAR['UPPER T' if first_page else 'CROSS'] + \
+        BOX_CHAR['HORIZONTAL'] * (line_length * (byte_length + 1) + 2) + '\n' + \
+        ' ' * (address_length + 2) + BOX_CHAR['VERTICAL']
+
+    for n in range(line_length):
+        if n == line_length / 2:
+            header += ' '
+        header += ' ' + '_' * (byte_length - 1) + '{:1X}'.format(n)
+
+    return header + '\n' + BOX_CHAR['HORIZONTAL'] * (address_length + 2) + BOX_CHAR['CROSS'] + \
+        BOX_CHAR['HORIZONTAL'] * (line_length * (byte_length + 1) + 2) + '\n'
+
+
+# The page headers are the same for every display, so they are created once: (first page header, other page header)
+HEADERS = {base: (page_header(base, True), page_header(base, False)) for base in LAYOUT}
+
 
 def display(out, data, base):
+    # The text is built up in memory and written in a single call, rather than issuing a write for every byte
     if base == 'bin':
-        for address in range(len(data)):
-            out.write('{:08b}\n'.format(data[address]))
-    else:
-        line_length = 16 if base == 'hex' else 10
-        address_length = 4 if base == 'hex' else 5
-        byte_length = 2 if base == 'hex' else 3
-        page_length = 256 if base == 'hex' else 200
-        address_string = (' {:04X}' if base == 'hex' else ' {:5}') + ' ' + BOX_CHAR['VERTICAL']
-        byte_string = (' {:02X}' if base == 'hex' else ' {:3}')
-
-        header = BOX_CHAR['HORIZONTAL'] * (address_length + 2) + '{}' + \
-            BOX_CHAR['HORIZONTAL'] * (line_length * (byte_length + 1) + 2) + '\n' + \
-            ' ' * (address_length + 2) + BOX_CHAR['VERTICAL']
-
-        for n in range(line_length):
-            if n == line_length / 2:
-                header += ' '
-            header += ' ' + '_' * (byte_length - 1) + '{:1X}'.format(n)
-
-        header += '\n' + BOX_CHAR['HORIZONTAL'] * (address_length + 2) + BOX_CHAR['CROSS'] + \
-            BOX_CHAR['HORIZONTAL'] * (line_length * (byte_length + 1) + 2) + '\n'
-
-        for address in range(0, len(data), line_length):
-            if address % page_length == 0:
-                out.write(header.format(BOX_CHAR['CROSS' if address > 0 else 'UPPER T']))
-            out.write(address_string.format(address))
-            for n in range(min(line_length, len(data) - address)):
-                if n == line_length / 2:
-                    out.write(" ")
-                out.write(byte_string.format(data[address + n]))
-            out.write('\n')
+        out.write(''.join(map(BIN_TABLE.__getitem__, data)))
+        return
+
+    text = []
+    line_length, _, _, page_length, address_string = LAYOUT[base]
+    address_string += ' ' + BOX_CHAR['VERTICAL']
+    byte_table = BYTE_TABLE[base]
+    first_header, header = HEADERS[base]
+    # Bind the methods used for every line to local names, so they aren't looked up on each use
+    append = text.append
+    format_address = address_string.format
+    convert = byte_table.__getitem__
+    half = line_length // 2
+
+    # Each line is converted as two slices (with an extra space between the halves), rather than byte by byte
+    for address in range(0, len(data), line_length):
+        if address % page_length == 0:
+            append(header if address > 0 else first_header)
+        append(format_address(address))
+        append(''.join(map(convert, data[address:address + half])))
+        if len(data) > address + half:
+            append(' ')
+            append(''.join(map(convert, data[address + half:address + line_length])))
+        append('\n')
+    out.write(''.join(text))
 
 
 # ANSI escape codes
@@ -0,0 +1,3 @@
+# hadloc.error and hadloc.utils import each other, and the import only succeeds if hadloc.utils is imported first, so it
+# is imported here, before any of the test modules import the assembler
+import hadloc.utils  # noqa: F401
@@ -0,0 +1,58 @@
+import pytest
+
+from hadloc.assembler import assemble
+from hadloc.error import CompilerException, ExceptionType
+
+# Every program is assembled with two nops at the start and a hlt at the end
+START = [0x01, 0x01]
+END = [0x00]
+
+
+def assemble_code(code, tmp_path, monkeypatch):
+    """
+    Assembles the given code, and returns the machine code as a list of bytes. The code is assembled in tmp_path, using
+    a relative file name, as the assembler lower cases the path of the files it writes
+    """
+    monkeypatch.chdir(tmp_path)
+    with open('test.hdc', 'w') as file:
+        file.write(code)
+    _, files = assemble(open('test.hdc'))
+    with open(files[0], 'rb') as file:
+        return list(file.read())
+
+
+@pytest.mark.parametrize(
+    'code,machine_code',
+    [
+        ('', []),
+        ('jle', [0x1E]),
+        ('jmp\njle\njge', [0x1F, 0x1E, 0x1B]),
+        ('ldb 0x7F', [0xFF]),
+        ('ldb 0x80', [0x80 | 0x7F, 0x43]),
+        ('ldu 0x7F00', [0xFF]),
+        ('ldu 0xFF00', [0x80, 0x43]),
+        ('ldu -1', [0x80, 0x43]),
+        ('lda label\nlabel: nop', [0x80, 0x29, 0x85, 0x01]),
+        ('lda label\nadd X X L\nlabel:\njmp', [0x80, 0x29, 0x86, 0x69, 0x1F]),
+        ('lda 0x1234\nmov X M', [0x92, 0x29, 0xB4, 0x3C]),
+    ]
+)
+def test_assemble(code, machine_code, tmp_path, monkeypatch):
+    assert assemble_code(code, tmp_path, monkeypatch) == START + machine_code + END
+
+
+@pytest.mark.parametrize(
+    'code,error_type,text,message',
+    [
+        ('mov Y', ExceptionType.ARG, 'movY', "Expected 2 register arguments in 'mov' instruction"),
+        ('mov\nnop', ExceptionType.ARG, 'mov', "Expected 2 register arguments in 'mov' instruction"),
+        ('mov X 1', ExceptionType.ARG, '1', "Expected register for argument 2 in 'mov' instruction"),
+        ('not X', ExceptionType.ARG, 'notX', "Expected 2 register arguments in 'not' instruction"),
+    ]
+)
+def test_assemble_error(code, error_type, text, message, tmp_path, monkeypatch):
+    with pytest.raises(CompilerException) as exception:
+        assemble_code(code, tmp_path, monkeypatch)
+    assert exception.value.error_type == error_type
+    assert exception.value.value.text == text
+    assert exception.value.msg == message
@@ -0,0 +1,46 @@
+import pytest
+
+from hadloc.assembler.label_encoder import encode_labels
+from hadloc.error import CompilerException
+
+
+def nops(count):
+    """Returns a list of count nop instructions"""
+    return [['nop'] for _ in range(count)]
+
+
+# The instructions the parser generates for 'lda label' followed by 'jmp'
+JUMP = [['ldu', 'label'], ['mov', 'L', 'H'], ['ldb', 'label'], ['jmp']]
+
+
+@pytest.mark.parametrize(
+    'instructions,label,expected',
+    [
+        # Forward jump
+        (JUMP + [['nop'], ['hlt']], 5,
+         [['ldb', 0], ['mov', 'L', 'H'], ['ldb', 5], ['jmp'], ['nop'], ['hlt']]),
+        # Backward jump
+        ([['nop'], ['inc', 'X', 'X']] + JUMP, 1,
+         [['nop'], ['inc', 'X', 'X'], ['ldb', 0], ['mov', 'L', 'H'], ['ldb', 1], ['jmp']]),
+        # Forward jump to 0x80, which the extended load pushes along to 0x81. 0x81 has the eighth bit set, so it has to
+        # be loaded as its 1's complement, and then inverted
+        (JUMP + nops(0x7C) + [['hlt']], 0x80,
+         [['ldb', 0], ['mov', 'L', 'H'], ['ldb', 0x7E], ['not', 'L', 'L'], ['jmp']] + nops(0x7C) + [['hlt']]),
+        # Backward jump from after 0x80 to 0x80. The load is after the label, so the label isn't moved
+        (nops(0x80) + [['hlt']] + JUMP, 0x80,
+         nops(0x80) + [['hlt'], ['ldb', 0], ['mov', 'L', 'H'], ['ldb', 0x7F], ['not', 'L', 'L'], ['jmp']]),
+        # Forward jump to 0x100, where ldu loads the high byte of 1
+        (JUMP + nops(0xFC) + [['hlt']], 0x100,
+         [['ldb', 1], ['mov', 'L', 'H'], ['ldb', 0], ['jmp']] + nops(0xFC) + [['hlt']]),
+    ]
+)
+def test_encode_labels(instructions, label, expected):
+    encode_labels(instructions, {'label': label})
+    assert instructions == expected
+
+
+def test_unresolvable():
+    # The label is at 0xFF if the load is one instruction (which needs two instructions), and at 0x100 if the load is
+    # two instructions (which needs one instruction), so it can't be resolved without a nop
+    with pytest.raises(CompilerException):
+        encode_labels([['ldb', 'label']] + nops(0xFF), {'label': 0xFF})
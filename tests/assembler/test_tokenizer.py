@@ -0,0 +1,100 @@
+import io
+
+import pytest
+
+from hadloc.assembler.tokenizer import Tokenizer, TokenType
+from hadloc.error import CompilerException, ExceptionType
+
+
+def tokenize(code):
+    """Tokenizes the given code, and returns the tokens as a list of (token type, value) pairs"""
+    file = io.StringIO(code)
+    file.name = 'test.hdc'
+    return [(token.token_type, token.value) for token in Tokenizer(file).run()]
+
+
+def tokenize_error(code):
+    """Tokenizes the given code, which must be invalid, and returns the exception raised"""
+    with pytest.raises(CompilerException) as exception:
+        tokenize(code)
+    return exception.value
+
+
+END = (TokenType.INSTRUCTION_END, None)
+
+
+@pytest.mark.parametrize(
+    'code,value',
+    [
+        ('0b0', 0), ('0b1011', 11), ('0B11111111', 255),
+        ('0', 0), ('017', 15), ('0777', 511),
+        ('1', 1), ('42', 42), ('65535', 65535),
+        ('0x0', 0), ('0xfF', 255), ('0XABCD', 0xABCD),
+        ("'a'", 97), ("' '", 32), ("'~'", 126), ("'''", 39)
+    ]
+)
+def test_integer(code, value):
+    assert tokenize(code) == [(TokenType.INTEGER, value)]
+
+
+@pytest.mark.parametrize(
+    'code,tokens',
+    [
+        ('mov X L', [(TokenType.KEYWORD, 'mov'), (TokenType.REGISTER, 'X'), (TokenType.REGISTER, 'L')]),
+        ('label: ldb -value', [(TokenType.IDENTIFIER, 'label'), (TokenType.SYMBOL, ':'), (TokenType.KEYWORD, 'ldb'),
+                               (TokenType.SYMBOL, '-'), (TokenType.IDENTIFIER, 'value')]),
+        ('define _x1 (1|2)&!0x3+-4', [(TokenType.KEYWORD, 'define'), (TokenType.IDENTIFIER, '_x1'),
+                                      (TokenType.SYMBOL, '('), (TokenType.INTEGER, 1), (TokenType.SYMBOL, '|'),
+                                      (TokenType.INTEGER, 2), (TokenType.SYMBOL, ')'), (TokenType.SYMBOL, '&'),
+                                      (TokenType.SYMBOL, '!'), (TokenType.INTEGER, 3), (TokenType.SYMBOL, '+'),
+                                      (TokenType.SYMBOL, '-'), (TokenType.INTEGER, 4)]),
+        ('nop\n\n\t hlt \n', [(TokenType.KEYWORD, 'nop'), END, (TokenType.KEYWORD, 'hlt')]),
+    ]
+)
+def test_tokens(code, tokens):
+    assert tokenize(code) == tokens
+
+
+@pytest.mark.parametrize(
+    'code',
+    [
+        'nop // comment\nhlt',
+        'nop//comment//\n// comment\nhlt',
+        'nop /* comment */\nhlt',
+        '/* comment */ nop /* comment\ncomment\n */ /**/ hlt // comment',
+        '/* comment // */ nop\r\n/* comment\r\n */hlt /* comment */',
+        'nop\n/* comment \n /* comment */ \n hlt'
+    ]
+)
+def test_comments(code):
+    assert tokenize(code) == [(TokenType.KEYWORD, 'nop'), END, (TokenType.KEYWORD, 'hlt')]
+
+
+@pytest.mark.parametrize('code', ['', '\n\n', '   \t', '// comment', '/* comment\n comment */\n'])
+def test_empty(code):
+    assert tokenize(code) == []
+
+
+@pytest.mark.parametrize(
+    'code,line,column,text,message',
+    [
+        ('nop\n  ldb 0b2', 1, 8, '2', 'Invalid binary literal'),
+        ('0b', 0, 1, '\0', 'Invalid binary literal'),
+        ('nop\n\n ldb 0xg', 2, 7, 'g', 'Invalid hex literal'),
+        ("ldb ''", 0, 4, "''", 'Invalid character literal. Cannot have empty character literals'),
+        ("ldb 'ab'", 0, 4, "'a", 'Invalid character literal. Character has no closing quotation mark'),
+        ("ldb '\x7f'", 0, 5, '\x7f',
+         'Invalid character literal. Only characters with an ASCII value from 32 to 126 are allowed'),
+        ('nop\n  /* comment\n\n', 1, 2, '/*', 'Comment not closed'),
+        ('nop /* comment */ /* comment', 0, 18, '/*', 'Comment not closed'),
+        ('mov X L\nmov X, L', 1, 5, ',', 'Unexpected character'),
+        ('nop\n\t@', 1, 1, '@', 'Unexpected character'),
+    ]
+)
+def test_error(code, line, column, text, message):
+    exception = tokenize_error(code)
+    assert exception.error_type == ExceptionType.SYNTAX
+    assert exception.msg == message
+    assert exception.value.text == text
+    assert exception.value.line() == line
+    assert exception.value.coordinates[0].column == column
@@ -23,6 +23,14 @@ def test_create_string(text, raw, lines, columns, line_break):
     assert [coordinate.column for coordinate in string.coordinates] == list(columns)
 
 
+@pytest.mark.parametrize('text', ['', 'abc', 'abc\ndef', '\nabc\n\ndef\n', 'abc\r\n\rdef'])
+def test_create_string_from_lines(text):
+    string = PositionedString.create_string(text.splitlines())
+    expected = PositionedString.create_string(text)
+    assert string.text == expected.text
+    assert string.coordinates == expected.coordinates
+
+
 @pytest.mark.parametrize(
     'a,b,lt,eq,gt',
     [
@@ -176,6 +184,20 @@ def test_add(a, b, result):
     assert a + b == result
 
 
+@pytest.mark.parametrize(
+    'strings,text,lines,columns',
+    [
+        ([], '', [], []),
+        (['Hello\nWorld'], 'HelloWorld', [0] * 5 + [1] * 5, list(range(5)) * 2),
+        (['ab', 'c\nd', '', 'ef'], 'abcdef', [0, 0, 0, 1, 0, 0], [0, 1, 0, 0, 0, 1])
+    ]
+)
+def test_join(strings, text, lines, columns):
+    result = PositionedString.join(PositionedString.create_string(string) for string in strings)
+    assert result.text == text
+    assert result.coordinates == [Coordinate(x, y) for x, y in zip(lines, columns)]
+
+
 @pytest.mark.parametrize(
     'text,index,substring,lines,columns',
     [